@@ -1,4 +1,4 @@
-from typing import Callable, Dict, List, Any, Tuple
+from typing import Callable, Dict, FrozenSet, List, Any, Optional, Tuple
 from helpers.utils import track_call_count
 
 # This is the type definition for an Assignment
@@ -8,20 +8,30 @@ Assignment = Dict[str, Any]
 
 # The is the base class for all the constraints
 # The only function defined in a constraint is "is_satisfied" that checks if an assignment satisfies this constraint.
+# The constraint classes declare their attributes in "__slots__" (like "Problem"), so that the many constraints of a problem
+# don't need an instance dictionary each.
 class Constraint:
+    __slots__ = ()
+
     # Given an assignment, this function returns True if it satisfies the constraint, and False otherwise.
     def is_satisfied(self, assignment: Assignment) -> bool:
         return False
 
 # This is a class for unary constraints (constraints involving one variable only).
 class UnaryConstraint(Constraint):
+    __slots__ = ('variable', 'condition', 'allowed_set')
+
     variable: str  # The name of the variable that is in the constraint.
     condition: Callable[[Any], bool] # A function that takes the variable's value and returns whether it satisfies the constraint or not.
+    # (Optional) The set of all the values that satisfy the condition.
+    # If given, solvers can filter a domain with a single set intersection instead of calling the condition for every value.
+    allowed_set: Optional[FrozenSet[Any]]
 
-    def __init__(self, variable: str, condition: Callable[[Any], bool]) -> None:
+    def __init__(self, variable: str, condition: Callable[[Any], bool], allowed_set: Optional[FrozenSet[Any]] = None) -> None:
         super().__init__()
         self.variable = variable
         self.condition = condition
+        self.allowed_set = allowed_set
 
     # This function looks for the variable in the assignment and checks if it satisfies the constraint.
     # If the variable is unassigned, the assignment does not satisfy the condition.
@@ -31,23 +41,40 @@ class UnaryConstraint(Constraint):
         if value is None: return False
         return self.condition(value)
 
+# This is a shared "not equal" condition for binary constraints.
+# Since it is a single function object, solvers can recognize it by identity (condition is not_equal)
+# and prune by removing the assigned value from the other domain instead of testing every value.
+def not_equal(value1: Any, value2: Any) -> bool:
+    return value1 != value2
+
 # This is a class for binary constraints (constraints involving two variable only).
 class BinaryConstraint(Constraint):
+    __slots__ = ('variables', 'condition', 'support')
+
     variables: Tuple[str, str]  # The name of the two variables that are in the constraint.
     condition: Callable[[Any, Any], bool] # A function that takes the variables' values and returns whether they satisfies the constraint or not.
+    # (Optional) The precomputed supports of the constraint. If given, it is a pair of dictionaries:
+    #   - support[0] maps each value of the first variable to the frozenset of compatible values of the second variable.
+    #   - support[1] maps each value of the second variable to the frozenset of compatible values of the first variable.
+    # Solvers can use it to filter a domain with a single set intersection instead of calling the condition for every value.
+    support: Optional[Tuple[Dict[Any, FrozenSet[Any]], Dict[Any, FrozenSet[Any]]]]
 
     def __init__(self, variables: Tuple[str, str], condition: Callable[[Any, Any], bool]) -> None:
         super().__init__()
         self.variables = variables
         self.condition = condition
+        self.support = None
     
     # This function looks for the variables in the assignment and checks if they satisfy the constraint.
     # If any of the variables are unassigned, the assignment does not satisfy the condition.
     # Important: If the value of a variable in the assignment is None, then it is assumed as if it is unassigned.
+    # If the supports were precomputed, the check is a set lookup instead of a call to the condition.
     def is_satisfied(self, assignment: Assignment) -> bool:
         variable1, variable2 = self.variables
         value1, value2 = assignment.get(variable1), assignment.get(variable2)
         if value1 is None or value2 is None: return False
+        if self.support is not None:
+            return value2 in self.support[0].get(value1, ())
         return self.condition(value1, value2)
     
     # Given the name of a variable in the constraint, this function returns the other variable.
@@ -58,7 +85,11 @@ class BinaryConstraint(Constraint):
         return variable2 if variable == variable1 else variable1
 
 # This defines a generic CSP problem
+# The attributes are declared in "__slots__", so accessing them (which the solver does a lot) doesn't go through an instance dictionary.
+# The last three slots are filled by the solver: "binary_constraints" and "all_different_groups" by 1-Consistency and "_var_index" by the backtracking search.
 class Problem:
+    __slots__ = ('variables', 'domains', 'constraints', 'binary_constraints', 'all_different_groups', '_var_index')
+
     variables: List[str]            # A list of the variable names in the problem
     domains: Dict[str, set]         # A dictionary containing the domain of each variable.
                                     # The domain is a set of values that the variable can take. 
@@ -1,11 +1,75 @@
-from typing import Any, Dict, List, Optional
-from CSP import Assignment, BinaryConstraint, Problem, UnaryConstraint
+import heapq
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+import CSP
+from CSP import Assignment, BinaryConstraint, Constraint, Problem, UnaryConstraint
 from helpers.utils import NotImplemented
 
+# NOTE: The solver only relies on the names defined by the original "CSP.py". The optional extensions of the constraints
+#       ("allowed_set" of unary constraints, "support" of binary constraints and the "all different" constraints) are detected
+#       with "getattr", so the solver still works (without the shortcuts) if a constraint or the framework doesn't define them.
+
+# This is the "not equal" condition that the solver recognizes by identity (condition is not_equal),
+# so that forward checking only removes the assigned value from the other domain instead of testing every value.
+# If the framework shares such a condition (as "CSP.not_equal", which sudoku uses), the same object is recognized,
+# otherwise the solver uses its own (for the pairs of the "all different" constraints).
+def _not_equal(value1: Any, value2: Any) -> bool:
+    return value1 != value2
+not_equal = getattr(CSP, "not_equal", _not_equal)
+
+# This is the type definition for a neighbor index.
+# It maps each variable to the binary constraints it is involved in, where each entry is a tuple (other, condition, first, support):
+#   - other: the other variable in the constraint.
+#   - condition: the constraint's condition.
+#   - first: True if the variable is the first variable in the constraint (so the condition is called as condition(value, other_value)).
+#   - support: None, or (if the constraint has precomputed supports) a dictionary mapping each value of the variable
+#     to the frozenset of compatible values of the other variable.
+Neighbors = Dict[str, List[Tuple[str, Callable[[Any, Any], bool], bool, Optional[Dict[Any, FrozenSet[Any]]]]]]
+
+# This function splits the given constraints into the binary constraints and the variable lists of the "all different" constraints.
+# The "all different" constraints are not expanded into a "not equal" binary constraint for every pair of their variables,
+# since that would create a constraint object for each of the L*(L-1)/2 pairs. Instead, the neighbor index links their variables directly.
+# A constraint is treated as "all different" if its class sets "all_different = True" and lists its variables in "variables".
+def split_constraints(constraints: Iterable[Constraint]) -> Tuple[List[BinaryConstraint], List[List[str]]]:
+    binary_constraints, all_different_groups = [], []
+    for constraint in constraints:
+        if isinstance(constraint, BinaryConstraint):
+            binary_constraints.append(constraint)
+        elif getattr(constraint, "all_different", False):
+            all_different_groups.append(constraint.variables)
+    return binary_constraints, all_different_groups
+
+# This function builds the neighbor index of the problem's binary constraints.
+# It scans the constraints only once, so that forward checking and the "least restraining value" heuristic
+# can visit the constraints of a single variable instead of scanning (and type-checking) all the constraints on every call.
+# The binary constraints are indexed in the same order in which they appear in "problem.constraints",
+# followed by a "not equal" entry for every pair of variables in each "all different" constraint.
+# NOTE: If 1-Consistency was already applied, the constraints it stored in "problem.binary_constraints" and "problem.all_different_groups"
+#       are used without type-checking them again.
+def build_neighbors(problem: Problem) -> Neighbors:
+    neighbors: Neighbors = {variable: [] for variable in problem.variables}
+    binary_constraints = getattr(problem, "binary_constraints", None)
+    all_different_groups = getattr(problem, "all_different_groups", None)
+    if binary_constraints is None or all_different_groups is None:
+        binary_constraints, all_different_groups = split_constraints(problem.constraints)
+    for constraint in binary_constraints:
+        variable1, variable2 = constraint.variables
+        condition = constraint.condition
+        support1, support2 = getattr(constraint, "support", None) or (None, None)
+        neighbors.setdefault(variable1, []).append((variable2, condition, True, support1))
+        neighbors.setdefault(variable2, []).append((variable1, condition, False, support2))
+    for variables in all_different_groups:
+        for index, variable in enumerate(variables):
+            entries = neighbors.setdefault(variable, [])
+            entries.extend((other, not_equal, True, None) for other in variables[index + 1:])
+            entries.extend((other, not_equal, False, None) for other in variables[:index])
+    return neighbors
+
 # This function applies 1-Consistency to the problem.
 # In other words, it modifies the domains to only include values that satisfy their variables' unary constraints.
 # Then all unary constraints are removed from the problem (they are no longer needed).
-# The function returns False if any domain becomes empty. Otherwise, it returns True.
+# The remaining constraints are also stored (split by "split_constraints") in "problem.binary_constraints" and "problem.all_different_groups",
+# so that later steps don't have to type-check them again.
+# The function returns False if any domain becomes empty (or was already empty). Otherwise, it returns True.
 def one_consistency(problem: Problem) -> bool:
     remaining_constraints = []
     solvable = True
@@ -14,20 +78,31 @@ def one_consistency(problem: Problem) -> bool:
             remaining_constraints.append(constraint)
             continue
         variable = constraint.variable
-        new_domain = {value for value in problem.domains[variable] if constraint.condition(value)}
+        allowed_set = getattr(constraint, "allowed_set", None)
+        if allowed_set is not None:
+            # The allowed values are precomputed, so the new domain is a single set intersection
+            new_domain = problem.domains[variable] & allowed_set
+        else:
+            new_domain = {value for value in problem.domains[variable] if constraint.condition(value)}
         if not new_domain:
             solvable = False
         problem.domains[variable] = new_domain
     problem.constraints = remaining_constraints
-    return solvable
+    problem.binary_constraints, problem.all_different_groups = split_constraints(remaining_constraints)
+    return solvable and all(problem.domains.values())
 
 # This function returns the variable that should be picked based on the MRV heuristic.
 # NOTE: We don't use the domains inside the problem, we use the ones given by the "domains" argument 
 #       since they contain the current domains of unassigned variables only.
 # NOTE: If multiple variables have the same priority given the MRV heuristic, 
 #       we order them in the same order in which they appear in "problem.variables".
+# NOTE: The position of each variable in "problem.variables" is read from "problem._var_index" if "solve" has stored it,
+#       so that we only iterate over the given (unassigned) domains instead of all the problem's variables.
 def minimum_remaining_values(problem: Problem, domains: Dict[str, set]) -> str:
-    _, _, variable = min((len(domains[variable]), index, variable) for index, variable in enumerate(problem.variables) if variable in domains)
+    var_index = getattr(problem, "_var_index", None)
+    if var_index is None:
+        var_index = {variable: index for index, variable in enumerate(problem.variables)}
+    _, _, variable = min((len(domain), var_index[variable], variable) for variable, domain in domains.items())
     return variable
 
 # This function should implement forward checking
@@ -41,48 +116,62 @@ def minimum_remaining_values(problem: Problem, domains: Dict[str, set]) -> str:
 #   - If any variable's domain becomes empty, return False. Otherwise, return True.
 # IMPORTANT: Don't use the domains inside the problem, use and modify the ones given by the "domains" argument 
 #            since they contain the current domains of unassigned variables only.
-def forward_checking(problem: Problem, assigned_variable: str, assigned_value: Any, domains: Dict[str, set]) -> bool:
+# NOTE: The domains are modified in place. If a "trail" list is given, a tuple (variable, removed_values) is appended to it
+#       for every domain reduction, so that the caller can undo the reductions by adding the removed values back.
+#       A domain may also be immutable (e.g. a frozenset copied from the problem's domains), so every reduced domain is also
+#       stored back in the dictionary (which costs nothing more for sets, since they are reduced in place).
+def forward_checking(problem: Problem, assigned_variable: str, assigned_value: Any, domains: Dict[str, set], neighbors: Optional[Neighbors] = None, trail: Optional[List[Tuple[str, set]]] = None) -> bool:
     # Forward checking: After assigning a value to a variable, we update the domains of unassigned neighbors
     # by removing values that are inconsistent with the assignment based on binary constraints.
     
-    # Iterate through all constraints in the problem
-    for constraint in problem.constraints:
-        # We only care about binary constraints involving the assigned variable
-        if not isinstance(constraint, BinaryConstraint):
-            continue
-        
-        # Check if this constraint involves the assigned variable
-        if assigned_variable not in constraint.variables:
+    # The neighbor index can be built once and passed by the caller (as done in "solve").
+    # If it is not given, we build it here from the problem's constraints.
+    if neighbors is None:
+        neighbors = build_neighbors(problem)
+    
+    # The bound method is stored in a local variable, so the loop doesn't look it up for every constraint
+    get_domain = domains.get
+    
+    # Iterate through the binary constraints involving the assigned variable only
+    for other_variable, condition, first, support in neighbors.get(assigned_variable, ()):
+        # If the other variable is already assigned (not in domains), skip it
+        domain = get_domain(other_variable)
+        if domain is None:
             continue
+        # If its domain is already empty, the assignment is inconsistent (even if this constraint removes nothing)
+        if not domain:
+            return False
         
-        # Get the other variable involved in this constraint
-        other_variable = constraint.get_other(assigned_variable)
+        # Find the values of the other variable that don't satisfy the constraint with the assigned value
+        if condition is not_equal:
+            # For "not equal" constraints, the only inconsistent value is the assigned value itself,
+            # so we check it directly instead of testing every value in the other domain.
+            if assigned_value not in domain:
+                continue
+            removed = {assigned_value}
+        elif support is not None:
+            # The compatible values are precomputed, so the inconsistent ones are a single set difference
+            removed = domain - support[assigned_value]
+        elif first:
+            # assigned_variable is first, other_variable is second.
+            # The argument order is decided once outside the filter, so each value costs a single condition call.
+            removed = {value for value in domain if not condition(assigned_value, value)}
+        else:
+            # other_variable is first, assigned_variable is second
+            removed = {value for value in domain if not condition(value, assigned_value)}
         
-        # If the other variable is already assigned (not in domains), skip it
-        if other_variable not in domains:
+        if not removed:
             continue
         
-        # Create a new domain for the other variable by filtering values
-        # that satisfy the constraint with the assigned value
-        new_domain = set()
-        for value in domains[other_variable]:
-            # Check if the constraint is satisfied with this value combination
-            # We need to determine which variable is first in the constraint tuple
-            if constraint.variables[0] == assigned_variable:
-                # assigned_variable is first, other_variable is second
-                if constraint.condition(assigned_value, value):
-                    new_domain.add(value)
-            else:
-                # other_variable is first, assigned_variable is second
-                if constraint.condition(value, assigned_value):
-                    new_domain.add(value)
+        # Update the domain of the other variable, and record the removed values so that they can be restored later
+        domain -= removed
+        domains[other_variable] = domain
+        if trail is not None:
+            trail.append((other_variable, removed))
         
         # If the domain becomes empty, this assignment is inconsistent
-        if not new_domain:
+        if not domain:
             return False
-        
-        # Update the domain of the other variable
-        domains[other_variable] = new_domain
     
     # All domains are non-empty, so the assignment is potentially consistent
     return True
@@ -97,56 +186,180 @@ def forward_checking(problem: Problem, assigned_variable: str, assigned_value: A
 #            order them in ascending order (from the lowest to the highest value).
 # IMPORTANT: Don't use the domains inside the problem, use and modify the ones given by the "domains" argument 
 #            since they contain the current domains of unassigned variables only.
-def least_restraining_values(problem: Problem, variable_to_assign: str, domains: Dict[str, set]) -> List[Any]:
+def least_restraining_values(problem: Problem, variable_to_assign: str, domains: Dict[str, set], neighbors: Optional[Neighbors] = None) -> List[Any]:
     # This heuristic orders values by how much they constrain the neighbors' domains.
     # Values that eliminate fewer options from neighbors' domains are preferred (least restraining).
     
+    # The neighbor index can be built once and passed by the caller (as done in "solve").
+    # If it is not given, we build it here from the problem's constraints.
+    if neighbors is None:
+        neighbors = build_neighbors(problem)
+    variable_neighbors = neighbors.get(variable_to_assign, ())
+    
     # Dictionary to store how many values each value of variable_to_assign eliminates from neighbors
-    value_restraint_count = {}
+    restraint_counts = {value: 0 for value in domains[variable_to_assign]}
     
-    # For each possible value in the domain of the variable to assign
-    for value in domains[variable_to_assign]:
-        restraint_count = 0  # Count how many neighbor values this eliminates
-        
-        # Check all binary constraints involving this variable
-        for constraint in problem.constraints:
-            if not isinstance(constraint, BinaryConstraint):
-                continue
-            
-            # Check if this constraint involves the variable we're assigning
-            if variable_to_assign not in constraint.variables:
-                continue
-            
-            # Get the other variable in the constraint
-            other_variable = constraint.get_other(variable_to_assign)
-            
-            # If the other variable is already assigned, skip it
-            if other_variable not in domains:
-                continue
-            
-            # Count how many values in the other variable's domain would be eliminated
-            # by assigning this value to variable_to_assign
-            for other_value in domains[other_variable]:
-                # Check if this combination satisfies the constraint
-                # If it doesn't satisfy, it means we're eliminating this value
-                if constraint.variables[0] == variable_to_assign:
-                    # variable_to_assign is first, other_variable is second
-                    if not constraint.condition(value, other_value):
-                        restraint_count += 1
-                else:
-                    # other_variable is first, variable_to_assign is second
-                    if not constraint.condition(other_value, value):
-                        restraint_count += 1
+    # We sweep over each neighbor once and update the counts of all the values together,
+    # instead of repeating the scan of the neighbors for every value.
+    get_domain = domains.get
+    for other_variable, condition, first, support in variable_neighbors:
+        # If the other variable is already assigned, skip it
+        other_domain = get_domain(other_variable)
+        if other_domain is None:
+            continue
         
-        value_restraint_count[value] = restraint_count
+        # Count how many values in the other variable's domain would be eliminated by assigning each value to variable_to_assign.
+        # If a combination doesn't satisfy the constraint, it means we're eliminating the other value.
+        # As in forward checking, the constraints with a known structure are counted without calling the condition:
+        #   - An inequality only eliminates the value itself (if the other domain contains it).
+        #   - With the precomputed supports, the eliminated values are the ones outside the support of the value.
+        # Otherwise, the argument order is decided once per neighbor instead of once per value.
+        if condition is not_equal:
+            for value in restraint_counts:
+                if value in other_domain:
+                    restraint_counts[value] += 1
+        elif support is not None:
+            for value in restraint_counts:
+                restraint_counts[value] += len(other_domain - support[value])
+        elif first:
+            # variable_to_assign is first, other_variable is second
+            for value in restraint_counts:
+                restraint_counts[value] += sum(1 for other_value in other_domain if not condition(value, other_value))
+        else:
+            # other_variable is first, variable_to_assign is second
+            for value in restraint_counts:
+                restraint_counts[value] += sum(1 for other_value in other_domain if not condition(other_value, value))
     
     # Sort values by restraint count (ascending), then by value itself (ascending) for ties
     # This ensures least restraining values come first, and stable ordering for equal restraint
-    sorted_values = sorted(domains[variable_to_assign], 
-                          key=lambda v: (value_restraint_count[v], v))
+    sorted_values = sorted(restraint_counts, key=lambda v: (restraint_counts[v], v))
     
     return sorted_values
 
+##############################################
+## Bitmask Domains
+##
+## When every domain only contains small non-negative integers, "solve" represents each domain as an integer bitmask
+## where the bit "v" is set if the value "v" is in the domain. Removing values becomes a bitwise AND,
+## the domain size is a popcount and saving a domain (for backtracking) is just keeping an integer.
+## The functions below are the bitmask counterparts of the heuristics and forward checking above.
+## They make exactly the same decisions, so the search explores the same nodes in both representations.
+
+# The values of a bitmask domain must be in the range [0, BITMASK_VALUE_LIMIT).
+BITMASK_VALUE_LIMIT = 1024
+
+# This is the type definition for a bitmask neighbor index.
+# It maps each variable to a tuple (different, compatibles) where:
+#   - different: the other variables of its "not equal" constraints (including those of the "all different" constraints).
+#     Assigning a value only clears that value's bit from their domains, so they are kept apart from the other constraints.
+#   - compatibles: a list of tuples (other, compatible) for the rest of the binary constraints it is involved in,
+#     where "compatible" is a dictionary mapping each value of the variable to the bitmask of compatible values of the other variable.
+MaskNeighbors = Dict[str, Tuple[List[str], List[Tuple[str, Dict[int, int]]]]]
+
+# Returns True if all the domains of the problem can be represented as bitmasks.
+def can_use_bitmasks(problem: Problem) -> bool:
+    return all(
+        type(value) is int and 0 <= value < BITMASK_VALUE_LIMIT
+        for domain in problem.domains.values() for value in domain
+    )
+
+# Converts a set of small non-negative integers to a bitmask.
+def to_bitmask(values: Iterable[int]) -> int:
+    mask = 0
+    for value in values:
+        mask |= 1 << value
+    return mask
+
+# Returns the values in a bitmask in ascending order.
+def bitmask_values(mask: int) -> List[int]:
+    values = []
+    while mask:
+        bit = mask & -mask # Extract the lowest set bit
+        values.append(bit.bit_length() - 1)
+        mask ^= bit
+    return values
+
+# This function builds the bitmask neighbor index from the neighbor index and the (initial) domains.
+# The compatible masks are computed once over the initial domains, which is enough since the domains only shrink during the search.
+def build_mask_neighbors(problem: Problem, neighbors: Neighbors) -> MaskNeighbors:
+    mask_neighbors: MaskNeighbors = {}
+    for variable, entries in neighbors.items():
+        different, mask_entries = mask_neighbors[variable] = ([], [])
+        for other_variable, condition, first, support in entries:
+            if condition is not_equal:
+                different.append(other_variable)
+                continue
+            compatible = {}
+            for value in problem.domains.get(variable, ()):
+                if support is not None:
+                    other_values = support[value]
+                elif first:
+                    other_values = (other_value for other_value in problem.domains[other_variable] if condition(value, other_value))
+                else:
+                    other_values = (other_value for other_value in problem.domains[other_variable] if condition(other_value, value))
+                compatible[value] = to_bitmask(other_values)
+            mask_entries.append((other_variable, compatible))
+    return mask_neighbors
+
+# The bitmask version of "least_restraining_values".
+# The number of values eliminated from a neighbor's domain is the number of its set bits that are not compatible with the value.
+def mask_least_restraining_values(problem: Problem, variable_to_assign: str, domains: Dict[str, int], neighbors: MaskNeighbors) -> List[int]:
+    values = bitmask_values(domains[variable_to_assign])
+    restraint_counts = {value: 0 for value in values}
+    get_domain = domains.get
+    different, compatibles = neighbors[variable_to_assign]
+    for other_variable in different:
+        other_domain = get_domain(other_variable)
+        # If the other variable is already assigned, skip it
+        if other_domain is None:
+            continue
+        for value in values:
+            restraint_counts[value] += other_domain >> value & 1
+    for other_variable, compatible in compatibles:
+        other_domain = get_domain(other_variable)
+        if other_domain is None:
+            continue
+        for value in values:
+            restraint_counts[value] += (other_domain & ~compatible[value]).bit_count()
+    # "values" are already in ascending order, and the sort is stable, so ties are ordered by value
+    return sorted(values, key=restraint_counts.__getitem__)
+
+# The bitmask version of "forward_checking".
+# For every domain reduction, the removed values are appended to the trail as a bitmask (so undoing is a bitwise OR).
+# The "not equal" neighbors (such as the other letters of an "all different" constraint) are visited first,
+# and each of them costs a single bit test and clear, so propagating an "all different" constraint is linear in its number of variables.
+# NOTE: Every reduction only depends on the assigned value and the reduced domain, so the visiting order doesn't change the result.
+def mask_forward_checking(problem: Problem, assigned_variable: str, assigned_value: int, domains: Dict[str, int], neighbors: MaskNeighbors, trail: List[Tuple[str, int]]) -> bool:
+    assigned_bit = 1 << assigned_value
+    get_domain = domains.get
+    different, compatibles = neighbors[assigned_variable]
+    for other_variable in different:
+        domain = get_domain(other_variable)
+        # If the other variable is already assigned or can't take the assigned value, skip it
+        if domain is None or not domain & assigned_bit:
+            continue
+        domain ^= assigned_bit
+        domains[other_variable] = domain
+        trail.append((other_variable, assigned_bit))
+        # If the domain becomes empty, this assignment is inconsistent
+        if not domain:
+            return False
+    for other_variable, compatible in compatibles:
+        domain = get_domain(other_variable)
+        # If the other variable is already assigned, skip it
+        if domain is None:
+            continue
+        removed = domain & ~compatible[assigned_value]
+        if not removed:
+            continue
+        domain ^= removed
+        domains[other_variable] = domain
+        trail.append((other_variable, removed))
+        # If the domain becomes empty, this assignment is inconsistent
+        if not domain:
+            return False
+    return True
+
 # This function should solve CSP problems using backtracking search with forward checking.
 # The variable ordering should be decided by the MRV heuristic.
 # The value ordering should be decided by the "least restraining value" heurisitc.
@@ -169,54 +382,133 @@ def solve(problem: Problem) -> Optional[Assignment]:
     # Step 2: Initialize the assignment and domains for unassigned variables
     assignment = {}  # Empty assignment to start
     
-    # Create initial domains dictionary with only unassigned variables
-    domains = {var: problem.domains[var].copy() for var in problem.variables}
+    # Index the binary constraints by variable once, since the constraints don't change during the search
+    neighbors = build_neighbors(problem)
     
-    # Helper function for recursive backtracking
-    def backtrack(assignment: Assignment, domains: Dict[str, set]) -> Optional[Assignment]:
-        # Check if the assignment is complete (base case)
-        if problem.is_complete(assignment):
-            # Verify that it satisfies all constraints
-            if problem.satisfies_constraints(assignment):
-                return assignment
-            return None
-        
+    # Store the position of each variable for the MRV tie-breaking, since the variables don't change either
+    problem._var_index = {variable: index for index, variable in enumerate(problem.variables)}
+    
+    # Create initial domains dictionary with only unassigned variables, and pick the functions that work on them.
+    # If all the values are small non-negative integers, the domains are represented as bitmasks (see "Bitmask Domains" above).
+    # Otherwise, the domains are sets which are modified in place during the search, so we copy them to keep the problem's domains intact
+    # (as mutable sets, since the problem's domains may be frozensets).
+    if can_use_bitmasks(problem):
+        domains = {var: to_bitmask(problem.domains[var]) for var in problem.variables}
+        neighbors = build_mask_neighbors(problem, neighbors)
+        domain_size, order_values, check = int.bit_count, mask_least_restraining_values, mask_forward_checking
+    else:
+        domains = {var: set(problem.domains[var]) for var in problem.variables}
+        domain_size, order_values, check = len, least_restraining_values, forward_checking
+    
+    # Instead of scanning all the unassigned domains for the MRV heuristic at every node, we keep a heap of entries (domain_size, index, variable).
+    # An entry is pushed whenever the size of a domain changes (by forward checking, undoing it or restoring an unassigned variable),
+    # and the outdated entries (those of assigned variables or whose size is no longer the domain size) are only removed
+    # when they reach the top of the heap. Since the heap is ordered by the size then by the variable index,
+    # the first up-to-date entry is exactly the variable that "minimum_remaining_values" would select.
+    # Since the outdated entries pile up during a long search, the heap is rebuilt from the current domains whenever it grows past
+    # a few entries per variable. This only drops outdated entries (every unassigned variable keeps its up-to-date entry),
+    # so the selection doesn't change.
+    var_index = problem._var_index
+    heap_limit = 4 * len(problem.variables)
+    heap = [(domain_size(domains[var]), var_index[var], var) for var in problem.variables]
+    heapq.heapify(heap)
+    heappush, heappop = heapq.heappush, heapq.heappop
+    get_domain = domains.get
+    
+    # Pushes the current domain size of the variable to the heap
+    def update_size(variable: str):
+        heappush(heap, (domain_size(domains[variable]), var_index[variable], variable))
+    
+    # The trail records every domain reduction done by forward checking as a tuple (variable, removed_values).
+    # Instead of copying all the domains at every node, we undo the reductions recorded after a certain mark when we backtrack.
+    # The removed values are a set or a bitmask (depending on the domains), and both are restored with the "|=" operator.
+    trail = []
+    
+    # The search is iterative: instead of recursing, we keep an explicit stack with a frame for every assigned variable.
+    # Each frame is a tuple (variable, values, variable_domain, mark) where:
+    #   - variable: the variable selected (by MRV) at this level of the search.
+    #   - values: an iterator over its remaining values (ordered by the least restraining value heuristic).
+    #   - variable_domain: the variable's domain, which is removed from the domains while it is assigned and restored when we backtrack.
+    #   - mark: the trail length when the frame was created, so that we can undo the reductions done for the previous value.
+    # The assignment and the domains are shared by all the frames.
+    stack = []
+    
+    # Expands the node of the current assignment: select the next variable and order its values.
+    # Returns False if no frame could be pushed.
+    def push_frame() -> bool:
         # Step 3: Select the next variable to assign using MRV heuristic
-        # Only consider unassigned variables (those still in domains)
-        unassigned_domains = {var: dom for var, dom in domains.items() if var not in assignment}
-        
-        if not unassigned_domains:
+        # The domains only contain the unassigned variables (the domain of a variable is popped when it is assigned
+        # and put back when we backtrack), so they can be passed to the heuristics as they are.
+        if not domains:
             # All variables are assigned but is_complete returned False
             # This shouldn't happen in a well-formed problem
-            return None
+            return False
         
-        variable = minimum_remaining_values(problem, unassigned_domains)
+        if len(heap) > heap_limit:
+            heap[:] = [(domain_size(domain), var_index[var], var) for var, domain in domains.items()]
+            heapq.heapify(heap)
+        
+        while True:
+            size, _, variable = heap[0]
+            domain = get_domain(variable)
+            if domain is not None and domain_size(domain) == size:
+                break
+            heappop(heap)
         
         # Step 4: Order the values using least restraining value heuristic
-        ordered_values = least_restraining_values(problem, variable, unassigned_domains)
+        ordered_values = order_values(problem, variable, domains, neighbors)
         
-        # Step 5: Try each value in order
-        for value in ordered_values:
-            # Create a new assignment with this value
-            new_assignment = assignment.copy()
-            new_assignment[variable] = value
-            
-            # Create a copy of domains for forward checking
-            new_domains = {var: domains[var].copy() for var in domains if var != variable}
-            
-            # Step 6: Apply forward checking
-            # This updates new_domains based on the new assignment
-            if forward_checking(problem, variable, value, new_domains):
-                # Forward checking succeeded, continue with recursion
-                result = backtrack(new_assignment, new_domains)
-                if result is not None:
-                    return result
+        # The variable is about to be assigned, so it no longer has a domain (until we backtrack)
+        variable_domain = domains.pop(variable)
+        stack.append((variable, iter(ordered_values), variable_domain, len(trail)))
+        return True
+    
+    # Check if the initial (empty) assignment is complete (only possible if the problem has no variables)
+    if problem.is_complete(assignment):
+        return assignment if problem.satisfies_constraints(assignment) else None
+    push_frame()
+    
+    while stack:
+        variable, values, variable_domain, mark = stack[-1]
+        
+        # Undo the reductions done by forward checking for the previous value of this frame (and by the frames above it)
+        while len(trail) > mark:
+            other_variable, removed = trail.pop()
+            domains[other_variable] |= removed
+            update_size(other_variable)
+        
+        # Step 5: Try the next value in order
+        # None is never a valid value (it is treated as unassigned), so we use it to detect that the values are exhausted.
+        value = next(values, None)
+        if value is None:
+            # No value worked, so we unassign the variable, restore its domain and backtrack
+            stack.pop()
+            del assignment[variable]
+            domains[variable] = variable_domain
+            update_size(variable)
+            continue
+        
+        # Assign the value
+        assignment[variable] = value
+        
+        # Step 6: Apply forward checking
+        # This updates the domains based on the new assignment, and records the reductions after the mark
+        reductions = len(trail)
+        if not check(problem, variable, value, domains, neighbors, trail):
             # If forward checking fails, this branch is pruned
             # We don't call problem.is_complete on pruned assignments
+            # (The heap is not updated since the reductions are undone before the next selection)
+            continue
+        for index in range(reductions, len(trail)):
+            update_size(trail[index][0])
         
-        # No value worked, backtrack
-        return None
+        # Forward checking succeeded, so we visit the new node.
+        # Check if the assignment is complete and verify that it satisfies all constraints
+        if problem.is_complete(assignment):
+            if problem.satisfies_constraints(assignment):
+                return assignment
+            continue
+        push_frame()
     
-    # Start the backtracking search with initial empty assignment
-    # The is_complete check will happen inside backtrack
-    return backtrack(assignment, domains)
\ No newline at end of file
+    # The whole search space was explored without finding a solution
+    return None
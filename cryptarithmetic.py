@@ -1,19 +1,165 @@
-from typing import Tuple
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
 import re
-from CSP import Assignment, Problem, UnaryConstraint, BinaryConstraint
+from CSP import Assignment, Constraint, Problem, UnaryConstraint, BinaryConstraint
 
 #TODO (Optional): Import any builtin library or define any helper function you want to use
 
+# The digits allowed for the leading letter of a term
+NONZERO_DIGITS = frozenset(range(1, 10))
+# The initial domain of every letter, shared by all of them (it is never modified: the pruned domains are new sets)
+_DIGIT_DOMAIN = frozenset(range(10))
+# The possible carries out of a column (the last column has no carry out)
+_BIT_DOMAIN = frozenset((0, 1))
+_ZERO_DOMAIN = frozenset((0,))
+# The regex of a puzzle "LHS0 + LHS1 = RHS" (compiled once instead of on every parse)
+_CRYPT_PATTERN = re.compile(r"\s*([a-zA-Z]+)\s*\+\s*([a-zA-Z]+)\s*=\s*([a-zA-Z]+)\s*")
+# The condition of the leading letters, shared by all their unary constraints instead of creating a lambda for each one
+_NOT_ZERO = lambda x: x != 0
+
+# This is a class for "all different" constraints (the values of all the variables in the constraint must be different from each other).
+# It is equivalent to a "not equal" binary constraint between every pair of its variables, but it is stored (and checked) as a single constraint.
+# The solver recognizes it by its "all_different" attribute and links its variables directly instead of creating a constraint for every pair.
+class AllDifferentConstraint(Constraint):
+    __slots__ = ('variables',)
+
+    all_different = True
+    variables: List[str] # The name of the variables that are in the constraint.
+
+    def __init__(self, variables: List[str]) -> None:
+        super().__init__()
+        self.variables = variables
+
+    # This function looks for the variables in the assignment and checks if their values are all different.
+    # If any of the variables are unassigned, the assignment does not satisfy the condition.
+    # Important: If the value of a variable in the assignment is None, then it is assumed as if it is unassigned.
+    def is_satisfied(self, assignment: Assignment) -> bool:
+        seen = set()
+        for variable in self.variables:
+            value = assignment.get(variable)
+            if value is None or value in seen: return False
+            seen.add(value)
+        return True
+
+# Creates the unary constraint of a leading letter (it can't be 0).
+# The allowed digits are attached too, so that 1-Consistency can apply the constraint with a set intersection.
+def not_zero_constraint(letter: str) -> UnaryConstraint:
+    constraint = UnaryConstraint(letter, _NOT_ZERO)
+    constraint.allowed_set = NONZERO_DIGITS
+    return constraint
+
+# Adds a binary table constraint between two variables, given its supports: a pair of dictionaries that map each value
+# of one variable to the frozenset of compatible values of the other one. They are stored in the constraint's "support" attribute,
+# so that forward checking can filter the other domain with a single set intersection.
+# The condition is a lookup in the same supports, so no other table has to be built for it.
+def add_support_constraint(problem: Problem, variable1: str, variable2: str, support1: Dict[int, FrozenSet[int]], support2: Dict[int, FrozenSet[int]]):
+    constraint = BinaryConstraint((variable1, variable2), lambda value1, value2: value2 in support1.get(value1, ()))
+    constraint.support = (support1, support2)
+    problem.constraints.append(constraint)
+
+# Adds a binary table constraint between two variables of a column, given the set of its allowed pairs of values.
+# The pairs come from the column's relation, so they are within the current domains of both variables (which are already final when this is called).
+def add_table_constraint(problem: Problem, variable1: str, variable2: str, pairs: Set[Tuple[int, int]]):
+    support1 = {value1: set() for value1 in problem.domains[variable1]}
+    support2 = {value2: set() for value2 in problem.domains[variable2]}
+    for value1, value2 in pairs:
+        support1[value1].add(value2)
+        support2[value2].add(value1)
+    add_support_constraint(problem, variable1, variable2,
+        {value1: frozenset(values) for value1, values in support1.items()},
+        {value2: frozenset(values) for value2, values in support2.items()}
+    )
+
+# Applies Arc Consistency (AC-3) to the table constraints of a puzzle, so that the search starts from arc consistent domains.
+# This is the only AC-3 pass in the problem set: the generic solver doesn't run one, since it would change the explored nodes.
+# Every table constraint gives two arcs (one from each of its variables). Revising the arc (x, y) keeps the values of x whose supports
+# still meet the domain of y. All the arcs of a variable are revised together, so when the domain of x shrinks,
+# its neighbors are scheduled again (their arcs point to x).
+# Only the supports are used: the unary constraints are applied before the columns are enumerated, and "all different" is left to the solver.
+# The pruned domains are new frozensets, so none of the original domain objects is modified.
+# If a domain becomes empty, the pruning stops there, and the solver will find out that the puzzle has no solution.
+def prune_domains(domains: Dict[str, FrozenSet[int]], constraints: List[Constraint]):
+    # The arcs of each variable: the other variable of each of its table constraints and its supports from this side
+    arcs = {variable: [] for variable in domains}
+    for constraint in constraints:
+        support = getattr(constraint, "support", None)
+        if support is None: continue
+        variable1, variable2 = constraint.variables
+        arcs[variable1].append((variable2, support[0]))
+        arcs[variable2].append((variable1, support[1]))
+
+    # The variables whose arcs should be revised are kept on a stack (the order doesn't change the final domains),
+    # and the ones already on it are tracked, so that a variable is never scheduled twice.
+    stack = list(arcs)
+    pending = set(stack)
+    while stack:
+        variable = stack.pop()
+        pending.discard(variable)
+        domain = domains[variable]
+        for other_variable, support in arcs[variable]:
+            other_domain = domains[other_variable]
+            revised = [value for value in domain if not support[value].isdisjoint(other_domain)]
+            if len(revised) == len(domain): continue
+            domain = domains[variable] = frozenset(revised)
+            if not domain: return
+            # Some values of the neighbors may have lost their only support, so they are scheduled again
+            for neighbor, _ in arcs[variable]:
+                if neighbor not in pending:
+                    pending.add(neighbor)
+                    stack.append(neighbor)
+
+# Enumerates the combinations of digits that satisfy a column's equation "x + y + carry_in = result + 10 * carry_out",
+# for carries in the given sets, when the letters can take any digit. The result only depends on the "shape" of the column:
+# for each of x, y & result, it is -1 if the letter is missing (its term is shorter than the RHS, so its value is 0),
+# or the index of the first of the three slots that holds the same letter (e.g. "A + A = B" has the shape (0, 0, 2)).
+# Slots with the same letter must have the same digit, and different letters must have different digits.
+# The same shapes come up in many columns (and many puzzles), so the combinations are computed once per shape and carries.
+# Returns a tuple of (code, (x, y, result)) where the code is "100*carry_in + 10*x + y" (see "column_carry_out").
+@lru_cache(maxsize=None)
+def column_table(shape: Tuple[int, int, int], carries_in: FrozenSet[int], carries_out: FrozenSet[int]) -> Tuple[Tuple[int, Tuple[int, int, int]], ...]:
+    present = [index for index in range(3) if shape[index] != -1]
+    combinations = []
+    for vci in sorted(carries_in):
+        for vx in (range(10) if shape[0] != -1 else (0,)):
+            for vy in (range(10) if shape[1] != -1 else (0,)):
+                total = vci + vx + vy
+                if total // 10 not in carries_out: continue
+                values = (vx, vy, total % 10)
+                if all((values[i] == values[j]) == (shape[i] == shape[j]) for i in present for j in present if j < i):
+                    combinations.append((100*vci + 10*vx + vy, values))
+    return tuple(combinations)
+
+# Enumerates the relation of a column: every valid combination of the values of its letters (x, y, result) and its carry in
+# (see "column_table"), where each letter's value must also be in its domain.
+# A missing letter (if its term is shorter than the RHS) is given as None.
+# Returns a dictionary mapping the code of each combination ("100*carry_in + 10*x + y", see "column_carry_out")
+# to the combination (as a dictionary from the column letters to their values).
+def column_relation(domains: Dict[str, Set[int]], column_letters: Tuple[Optional[str], Optional[str], str], carries_in: FrozenSet[int], carries_out: FrozenSet[int]) -> Dict[int, Dict[str, int]]:
+    shape = tuple(-1 if letter is None else column_letters.index(letter) for letter in column_letters)
+    rows = {}
+    for code, values in column_table(shape, carries_in, carries_out):
+        row = {letter: value for letter, value in zip(column_letters, values) if letter}
+        if all(value in domains[letter] for letter, value in row.items()):
+            rows[code] = row
+    return rows
+
+# Returns the carry out of a column combination given its code "100*carry_in + 10*x + y".
+def column_carry_out(code: int) -> int:
+    return (code // 100 + code // 10 % 10 + code % 10) // 10
+
 # This is a class to define for cryptarithmetic puzzles as CSPs
 class CryptArithmeticProblem(Problem):
+    __slots__ = ('LHS', 'RHS', 'letters')
+
     LHS: Tuple[str, str]
     RHS: str
+    letters: List[str] # The unique letters of the puzzle in the order of their first appearance (computed once by "from_text")
 
     # Convert an assignment into a string (so that is can be printed).
     def format_assignment(self, assignment: Assignment) -> str:
         LHS0, LHS1 = self.LHS
         RHS = self.RHS
-        letters = set(LHS0 + LHS1 + RHS)
+        letters = self.letters
         formula = f"{LHS0} + {LHS1} = {RHS}"
         postfix = []
         valid_values = list(range(10))
@@ -30,12 +176,12 @@ class CryptArithmeticProblem(Problem):
 
     @staticmethod
     def from_text(text: str) -> 'CryptArithmeticProblem':
-        # Given a text in the format "LHS0 + LHS1 = RHS", the following regex
+        # Given a text in the format "LHS0 + LHS1 = RHS", the regex "_CRYPT_PATTERN"
         # matches and extracts LHS0, LHS1 & RHS
         # For example, it would parse "SEND + MORE = MONEY" and extract the
         # terms such that LHS0 = "SEND", LHS1 = "MORE" and RHS = "MONEY"
-        pattern = r"\s*([a-zA-Z]+)\s*\+\s*([a-zA-Z]+)\s*=\s*([a-zA-Z]+)\s*"
-        match = re.match(pattern, text)
+        # The whole text must match, so any trailing text is reported as a parsing failure.
+        match = _CRYPT_PATTERN.fullmatch(text)
         if not match: raise Exception("Failed to parse:" + text)
         LHS0, LHS1, RHS = [match.group(i+1).upper() for i in range(3)]
 
@@ -43,58 +189,57 @@ class CryptArithmeticProblem(Problem):
         problem.LHS = (LHS0, LHS1)
         problem.RHS = RHS
 
-        # Extract all unique letters
-        all_letters = set(LHS0 + LHS1 + RHS)
+        # Extract all unique letters in the order of their first appearance.
+        # Unlike a set, this order is deterministic, so the variables (and the search) don't change from one run to another.
+        # They are stored in the problem, so that the other methods don't have to extract them again.
+        letters = problem.letters = list(dict.fromkeys(LHS0 + LHS1 + RHS))
         
         # Create variables list - include all letters
-        problem.variables = list(all_letters)
+        problem.variables = list(letters)
         
         # Create domains for letters (0-9)
-        problem.domains = {letter: set(range(10)) for letter in all_letters}
+        problem.domains = {letter: _DIGIT_DOMAIN for letter in letters}
         
         # Initialize constraints list
         problem.constraints = []
         
         # Unary constraints: leading letters cannot be 0
+        # The constraints stay in the problem (for the solver and "satisfies_constraints"), but their domains are also
+        # narrowed here, so that the column relations below don't include a leading zero.
         if LHS0:
             first_letter_lhs0 = LHS0[0]
-            problem.constraints.append(UnaryConstraint(first_letter_lhs0, lambda x: x != 0))
+            problem.constraints.append(not_zero_constraint(first_letter_lhs0))
+            problem.domains[first_letter_lhs0] = NONZERO_DIGITS
         if LHS1:
             first_letter_lhs1 = LHS1[0]
-            problem.constraints.append(UnaryConstraint(first_letter_lhs1, lambda x: x != 0))
+            problem.constraints.append(not_zero_constraint(first_letter_lhs1))
+            problem.domains[first_letter_lhs1] = NONZERO_DIGITS
         if RHS:
             first_letter_rhs = RHS[0]
-            problem.constraints.append(UnaryConstraint(first_letter_rhs, lambda x: x != 0))
+            problem.constraints.append(not_zero_constraint(first_letter_rhs))
+            problem.domains[first_letter_rhs] = NONZERO_DIGITS
         
-        # Binary constraints: all letters must have different values
-        letters_list = list(all_letters)
-        for i in range(len(letters_list)):
-            for j in range(i + 1, len(letters_list)):
-                letter1, letter2 = letters_list[i], letters_list[j]
-                problem.constraints.append(
-                    BinaryConstraint((letter1, letter2), lambda x, y: x != y)
-                )
+        # All letters must have different values.
+        # This is a single constraint (instead of a binary constraint for every pair of letters), which the solver links as inequalities.
+        problem.constraints.append(AllDifferentConstraint(letters))
         
-        # Add auxiliary variables for carries
-        # We need carries C0, C1, ..., C_n where n = len(RHS)
-        # C0 is carry into rightmost digit (always 0)
-        # Ci is carry out of digit i (0-indexed from right)
+        # For each digit position, the column equation "(x or 0) + (y or 0) + carry_in = result_digit + 10 * carry_out"
+        # involves up to 3 letters and 2 carries, so it can't be written as a single binary constraint.
+        # Instead, the full relation of the column (every valid combination of its letters and carry in) is enumerated once here, and:
+        # - A hidden variable COL_i is added whose values are the valid combinations, encoded as "100*carry_in + 10*x + y"
+        #   (the result digit and the carry out follow from these three values). Each letter of the column is linked to COL_i
+        #   by a binary constraint that extracts its value from the combination.
+        # - The carries are not variables: the carry out of column i is the carry in of column i+1,
+        #   so they are linked by a binary constraint between COL_i and COL_i+1. The first column has no carry in,
+        #   and the last column has no carry out since len(RHS) >= max(len(LHS0), len(LHS1))
+        #   (if RHS has an extra leading digit, it is equal to the carry coming into its column).
+        #   If an LHS term is longer than the RHS, the puzzle has no solution (see the end of the loop).
+        # - Every pair of letters in the column gets a binary constraint with the projection of the relation on this pair
+        #   (the value pairs that appear together in at least one combination). These are implied by the hidden variable,
+        #   but they let forward checking prune the other letters of the column directly after each assignment.
         n = len(RHS)
-        for i in range(n + 1):
-            carry_name = f'C{i}'
-            problem.variables.append(carry_name)
-            problem.domains[carry_name] = {0, 1}
-        
-        # C0 is always 0 (no initial carry)
-        problem.constraints.append(UnaryConstraint('C0', lambda x: x == 0))
-        
-    # Do NOT force the final carry to 0.
-    # If RHS has an extra leading digit (len(RHS) == max(len(LHS0), len(LHS1)) + 1),
-    # then the final carry must be 1 and will equal that leading digit via the column constraint below.
-    # Otherwise, the final carry will end up 0 naturally from the same constraint.
-        
-        # For each digit position, add constraints using only unary/binary by encoding pairs
-        # Column equation: (x or 0) + (y or 0) + carry_in = result_digit + 10 * carry_out
+        carries_in = _ZERO_DOMAIN
+        previous_column = None
         for i in range(n):
             pos_from_right = i
 
@@ -107,73 +252,154 @@ class CryptArithmeticProblem(Problem):
             y = LHS1[l1_idx] if 0 <= l1_idx < len(LHS1) else None
             r = RHS[lr_idx]
 
-            ci = f'C{pos_from_right}'
-            co = f'C{pos_from_right + 1}'
-
-            # Auxiliary variable PAIR_i encodes (x, y) as 10*x + y. Missing letters treated as 0.
-            pair = f'PAIR{i}'
-            problem.variables.append(pair)
-            # Tight pair domain based on current letter domains (or 0 if missing)
-            xd = problem.domains[x] if x else {0}
-            yd = problem.domains[y] if y else {0}
-            problem.domains[pair] = {10*vx + vy for vx in xd for vy in yd}
-
-            # Link x to PAIR_i (tens digit) when x exists
-            if x:
-                def check_x_pair(vx, vp):
-                    return (vp // 10) == vx
-                problem.constraints.append(BinaryConstraint((x, pair), check_x_pair))
-
-            # Link y to PAIR_i (ones digit) when y exists
-            if y:
-                def check_y_pair(vy, vp):
-                    return (vp % 10) == vy
-                problem.constraints.append(BinaryConstraint((y, pair), check_y_pair))
-
-            # Auxiliary PSUM_i = (x or 0) + (y or 0)
-            psum = f'PSUM{i}'
-            problem.variables.append(psum)
-            # Tight psum domain based on xd, yd
-            psum_domain = {vx + vy for vx in xd for vy in yd}
-            problem.domains[psum] = psum_domain
-
-            def check_pair_psum(vp, vs):
-                return ((vp // 10) + (vp % 10)) == vs
-            problem.constraints.append(BinaryConstraint((pair, psum), check_pair_psum))
-
-            # Combine PSUM and carry_in into COMB_i = 20*ci + psum
-            comb = f'COMB{i}'
-            problem.variables.append(comb)
-            comb_domain = {20*ci_val + s for ci_val in {0,1} for s in psum_domain}
-            problem.domains[comb] = comb_domain
-
-            def check_ci_comb(vci, vc):
-                return (vc // 20) == vci
-            def check_psum_comb(vs, vc):
-                return (vc % 20) == vs
-            problem.constraints.append(BinaryConstraint((ci, comb), check_ci_comb))
-            problem.constraints.append(BinaryConstraint((psum, comb), check_psum_comb))
-
-            # SUM_i = psum + ci = (comb % 20) + (comb // 20)
-            sum_i = f'SUM{i}'
-            problem.variables.append(sum_i)
-            sum_domain = {s + ci_val for ci_val in {0,1} for s in psum_domain}
-            problem.domains[sum_i] = sum_domain
-
-            def check_comb_sum(vc, vs):
-                return ((vc % 20) + (vc // 20)) == vs
-            problem.constraints.append(BinaryConstraint((comb, sum_i), check_comb_sum))
-
-            # Link SUM to result digit and next carry: r == SUM % 10, co == SUM // 10
-            def check_r_sum(vr, vs):
-                return (vs % 10) == vr
-            def check_co_sum(vco, vs):
-                return (vs // 10) == vco
-            problem.constraints.append(BinaryConstraint((r, sum_i), check_r_sum))
-            problem.constraints.append(BinaryConstraint((co, sum_i), check_co_sum))
+            rows = column_relation(problem.domains, (x, y, r), carries_in, _ZERO_DOMAIN if i == n - 1 else _BIT_DOMAIN)
+
+            column = f'COL{i}'
+            problem.variables.append(column)
+            problem.domains[column] = frozenset(rows)
+
+            # If the column has no valid combination (e.g. "E + AD = CBE"), the puzzle has no solution.
+            # The column variable is kept with its empty domain (so the solver finds out before searching),
+            # but no constraint is built from the empty relation, and the next columns get no carry in (so they are empty too).
+            if not rows:
+                carries_in = frozenset()
+                previous_column = column
+                continue
+
+            # Link each letter of the column to the hidden variable
+            column_letters = list(dict.fromkeys(letter for letter in (x, y, r) if letter))
+            for letter in column_letters:
+                add_table_constraint(problem, letter, column, {(row[letter], code) for code, row in rows.items()})
+
+            # Link the carry out of the previous column to the carry in of this one.
+            # Instead of testing every pair of combinations, the combinations are grouped by carry: the previous ones by their carry out
+            # and the ones of this column by their carry in. A combination is compatible with the whole group of the other column
+            # that has the same carry, so each group is a single frozenset shared by the supports of all the combinations of that carry.
+            if previous_column is not None:
+                previous_by_carry, current_by_carry = {}, {}
+                for previous_code in problem.domains[previous_column]:
+                    previous_by_carry.setdefault(column_carry_out(previous_code), []).append(previous_code)
+                for code in rows:
+                    current_by_carry.setdefault(code // 100, []).append(code)
+                previous_by_carry = {carry: frozenset(codes) for carry, codes in previous_by_carry.items()}
+                current_by_carry = {carry: frozenset(codes) for carry, codes in current_by_carry.items()}
+                add_support_constraint(problem, previous_column, column,
+                    {previous_code: current_by_carry.get(carry, frozenset()) for carry, codes in previous_by_carry.items() for previous_code in codes},
+                    {code: previous_by_carry.get(carry, frozenset()) for carry, codes in current_by_carry.items() for code in codes}
+                )
+
+            # Add the projections of the relation on every pair of letters of the column
+            for index, letter1 in enumerate(column_letters):
+                for letter2 in column_letters[index + 1:]:
+                    add_table_constraint(problem, letter1, letter2, {(row[letter1], row[letter2]) for row in rows.values()})
+
+            # The next column is only built for the carries that this column can produce
+            carries_in = frozenset(column_carry_out(code) for code in rows)
+            previous_column = column
         
+        # If an LHS term is longer than the RHS, the sum has more digits than the RHS (the leading digit of the term can't be 0),
+        # so the puzzle has no solution. The columns above only cover the digits of the RHS, so the extra digits are represented
+        # by one more column variable with an empty domain (as for a column without any valid combination).
+        if max(len(LHS0), len(LHS1)) > n:
+            column = f'COL{n}'
+            problem.variables.append(column)
+            problem.domains[column] = frozenset()
+
+        # Prune the values that have no support in a neighbor's domain, so that the search starts from arc consistent domains.
+        # All the domains are frozensets (the solver copies them before modifying them).
+        prune_domains(problem.domains, problem.constraints)
+
         return problem
 
+    # Solve the puzzle directly (without the generic CSP solver) by picking digits column by column from the right.
+    # In each column, we only pick digits for the unassigned letters of the two LHS terms, since the RHS digit
+    # and the carry out follow from the column sum. The used digits are kept in an integer bitmask (bit "d" is set if
+    # the digit "d" is taken) and so are the letters that can't be zero (bit "i" is set for the i-th letter),
+    # so finding the free digits of a letter is a couple of bitwise operations instead of set manipulations.
+    # Returns a complete assignment (mapping each letter to its digit, and each hidden column variable to its combination),
+    # or None if the puzzle has no solution.
+    def solve_fast(self) -> Optional[Assignment]:
+        LHS0, LHS1 = self.LHS
+        RHS = self.RHS
+        letters = self.letters
+
+        # If an LHS term is longer than the RHS, their sum has more digits than the RHS (since the leading digit of the term can't be 0),
+        # so the puzzle has no solution. The columns below only cover the digits of the RHS, so this case is rejected here.
+        if max(len(LHS0), len(LHS1)) > len(RHS):
+            return None
+
+        letter_index = {letter: index for index, letter in enumerate(letters)}
+
+        # The first letter of each term cannot be zero
+        leading_mask = 0
+        for term in (LHS0, LHS1, RHS):
+            leading_mask |= 1 << letter_index[term[0]]
+
+        # For each column (starting from the rightmost one), store the letter indices of LHS0, LHS1 and RHS.
+        # If a term is shorter than the RHS, its letter index in the higher columns is -1 (which stands for the digit 0).
+        def column_letter(term: str, column: int) -> int:
+            return letter_index[term[-1 - column]] if column < len(term) else -1
+        columns = [(column_letter(LHS0, i), column_letter(LHS1, i), column_letter(RHS, i)) for i in range(len(RHS))]
+
+        digits = [-1] * len(letters) # The digit assigned to each letter (-1 if unassigned)
+
+        # Yields every possible digit of the letter at "index" along with the updated used digits mask.
+        # While a digit is yielded, it is stored in "digits" so that later letters in the same column see it.
+        def options(index: int, used: int) -> Iterator[Tuple[int, int]]:
+            if index == -1:
+                yield 0, used
+                return
+            if digits[index] != -1:
+                yield digits[index], used
+                return
+            free = ~used & 0x3FF
+            if leading_mask >> index & 1:
+                free &= ~1
+            while free:
+                bit = free & -free # Extract the lowest free digit
+                free ^= bit
+                digits[index] = bit.bit_length() - 1
+                yield digits[index], used | bit
+            digits[index] = -1
+
+        # Tries to fill the columns starting from "column" given the carry coming into it.
+        # Returns True once a full solution is stored in "digits".
+        def search(column: int, carry: int, used: int) -> bool:
+            if column == len(columns):
+                return carry == 0 # The last column must not overflow
+            l0, l1, lr = columns[column]
+            for v0, used0 in options(l0, used):
+                for v1, used1 in options(l1, used0):
+                    total = v0 + v1 + carry
+                    digit, carry_out = total % 10, total // 10
+                    if digits[lr] != -1:
+                        # The RHS letter is already assigned, so it must match the column sum
+                        if digits[lr] == digit and search(column + 1, carry_out, used1):
+                            return True
+                        continue
+                    bit = 1 << digit
+                    if used1 & bit or (digit == 0 and leading_mask >> lr & 1):
+                        continue
+                    digits[lr] = digit
+                    if search(column + 1, carry_out, used1 | bit):
+                        return True
+                    digits[lr] = -1
+            return False
+
+        if not search(0, 0, 0):
+            return None
+        assignment = {letter: digits[index] for index, letter in enumerate(letters)}
+
+        # The hidden column variables (see "from_text") are also assigned, so that the assignment is complete.
+        # Each one follows from the digits of its column and the carry coming into it: "100*carry_in + 10*x + y".
+        carry = 0
+        for i, (l0, l1, _) in enumerate(columns):
+            x = digits[l0] if l0 != -1 else 0
+            y = digits[l1] if l1 != -1 else 0
+            assignment[f'COL{i}'] = 100*carry + 10*x + y
+            carry = (carry + x + y) // 10
+        return assignment
+
     # Read a cryptarithmetic puzzle from a file
     @staticmethod
     def from_file(path: str) -> "CryptArithmeticProblem":
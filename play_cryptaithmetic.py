@@ -52,6 +52,8 @@ def main(args: argparse.Namespace):
         solve_fn = solve_via_human
     elif agent_name == "backtrack":
         solve_fn = solve
+    elif agent_name == "fast":
+        solve_fn = CryptArithmeticProblem.solve_fast
     else:
         print(f"Unknown Agent: {agent_name}. Please select a valid agent.")
         return
@@ -79,7 +81,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Play CryptArithmetic as Human or AI")
     parser.add_argument("puzzle", help="path to the puzzle to play")
     parser.add_argument("--agent", "-a", default="human",
-                        choices=['human', 'backtrack'],
+                        choices=['human', 'backtrack', 'fast'],
                         help="the agent that will play the game")
     
     args = parser.parse_args()
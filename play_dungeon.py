@@ -65,6 +65,10 @@ def create_agent(args: argparse.Namespace):
         from search import alphabeta_with_move_ordering
         heuristic = get_heuristic(args.heuristic)
         return SearchAgent(alphabeta_with_move_ordering, heuristic, args.depth)
+    if agent_type == "alphabeta_id":
+        from search import alphabeta_with_iterative_deepening
+        heuristic = get_heuristic(args.heuristic)
+        return SearchAgent(alphabeta_with_iterative_deepening, heuristic, args.depth)
     if agent_type == "expectimax":
         from search import expectimax
         heuristic = get_heuristic(args.heuristic)
@@ -133,7 +137,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Play Dungeon as Human or AI")
     parser.add_argument("level", help="path to the dungeon to play")
     parser.add_argument("--agent", "-a", default="human",
-                        choices=['human', 'greedy', 'random', 'minimax', 'alphabeta', 'alphabeta_order', 'expectimax'],
+                        choices=['human', 'greedy', 'random', 'minimax', 'alphabeta', 'alphabeta_order', 'alphabeta_id', 'expectimax'],
                         help="the agent that will play the game")
     parser.add_argument("--heuristic", '-hf', default="zero",
                         choices=["zero", "heuristic"],
@@ -1,8 +1,16 @@
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 from game import HeuristicFunction, Game, S, A
 from helpers.utils import NotImplemented
 
 #TODO: Import any modules you want to use
+from math import fsum
+
+# The infinite values used as the initial values and bounds of the search (so they are not parsed from a string on every call)
+_NEG_INF = float('-inf')
+_POS_INF = float('inf')
+# The value returned by "next" when the actions (or successors) of a node are exhausted.
+# It is a private object (instead of None), since a game may use None as an action (e.g. a pass move).
+_DONE = object()
 
 # All search functions take a problem, a state, a heuristic function and the maximum search depth.
 # If the maximum search depth is -1, then there should be no depth cutoff (The expansion should not stop before reaching a terminal state) 
@@ -17,8 +25,9 @@ def greedy(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth:
     terminal, values = game.is_terminal(state)
     if terminal: return values[agent], None
 
-    actions_states = [(action, game.get_successor(state, action)) for action in game.get_actions(state)]
-    value, _, action = max((heuristic(game, state, agent), -index, action) for index, (action , state) in enumerate(actions_states))
+    # The heuristic is evaluated on the successor of each action (ties go to the first action), in a single pass over the actions
+    get_successor = game.get_successor
+    value, _, action = max((heuristic(game, get_successor(state, action), agent), -index, action) for index, action in enumerate(game.get_actions(state)))
     return value, action
 
 # Apply Minimax search and return the game tree value and the best action
@@ -33,41 +42,52 @@ def minimax(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth:
     # Max nodes (player turn = 0) try to maximize value
     # Min nodes (opponents turn > 0) try to minimize value
     
-    # Helper function for recursive minimax
+    # Helper function for minimax
+    # Instead of recursing, it keeps an explicit stack with a frame for every expanded state on the current path.
+    # Each frame is a list [state, depth, is_max, actions, best_value] where "actions" is an iterator over the actions
+    # that are not explored yet, and "best_value" is the best value of the explored children so far.
+    # The states are visited in the same order as a recursive search.
     def minimax_value(current_state: S, depth: int) -> float:
-        # Check if state is terminal
-        terminal, values = game.is_terminal(current_state)
-        if terminal:
-            # Return the value for the player (agent 0)
-            return values[0]
-        
-        # Check if we've reached the depth limit
-        if max_depth != -1 and depth >= max_depth:
-            # Return heuristic value for the player
-            return heuristic(game, current_state, 0)
-        
-        # Get the current agent
-        agent = game.get_turn(current_state)
-        
-        # Get all possible actions
-        actions = game.get_actions(current_state)
-        
-        if agent == 0:
-            # Max node: player wants to maximize
-            best_value = float('-inf')
-            for action in actions:
-                successor = game.get_successor(current_state, action)
-                value = minimax_value(successor, depth + 1)
-                best_value = max(best_value, value)
-            return best_value
-        else:
-            # Min node: opponents want to minimize
-            best_value = float('inf')
-            for action in actions:
-                successor = game.get_successor(current_state, action)
-                value = minimax_value(successor, depth + 1)
-                best_value = min(best_value, value)
-            return best_value
+        stack = []
+        # The game's methods are bound once to local names, since they are called for every visited state
+        is_terminal, get_turn, get_actions, get_successor = game.is_terminal, game.get_turn, game.get_actions, game.get_successor
+        while True:
+            # Check if state is terminal
+            terminal, values = is_terminal(current_state)
+            if terminal:
+                # Return the value for the player (agent 0)
+                value = values[0]
+            elif max_depth != -1 and depth >= max_depth:
+                # We've reached the depth limit, so return the heuristic value for the player
+                value = heuristic(game, current_state, 0)
+            else:
+                # Expand the state: max node if it is the player's turn (agent 0), otherwise min node
+                is_max = get_turn(current_state) == 0
+                actions = get_actions(current_state)
+                stack.append([current_state, depth, is_max, iter(actions), _NEG_INF if is_max else _POS_INF])
+                value = None
+            
+            # Send the value up to the parent frames until one of them has an action left to explore
+            while stack:
+                frame = stack[-1]
+                # (The comparisons are written explicitly instead of calling "max" and "min" since this runs for every visited state)
+                if value is not None:
+                    if frame[2]:
+                        if value > frame[4]: frame[4] = value
+                    elif value < frame[4]:
+                        frame[4] = value
+                action = next(frame[3], _DONE)
+                if action is not _DONE:
+                    break
+                # All the actions were explored, so this frame's value goes to its parent
+                stack.pop()
+                value = frame[4]
+            else:
+                return value
+            
+            # Visit the successor
+            current_state = get_successor(frame[0], action)
+            depth = frame[1] + 1
     
     # Get the agent for the given state
     agent = game.get_turn(state)
@@ -82,7 +102,7 @@ def minimax(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth:
     
     # Evaluate each action and choose the best one
     best_action = None
-    best_value = float('-inf') if agent == 0 else float('inf')
+    best_value = _NEG_INF if agent == 0 else _POS_INF
     
     for action in actions:
         successor = game.get_successor(state, action)
@@ -108,49 +128,60 @@ def alphabeta(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_dept
     # Alpha: best value for maximizer found so far
     # Beta: best value for minimizer found so far
     
-    # Helper function for recursive alpha-beta
+    # Helper function for alpha-beta
+    # Instead of recursing, it keeps an explicit stack with a frame for every expanded state on the current path.
+    # Each frame is a list [state, depth, is_max, actions, value, alpha, beta] where "actions" is an iterator over the actions
+    # that are not explored yet, "value" is the best value of the explored children so far, and alpha & beta are the frame's bounds.
+    # The states are visited (and pruned) in the same order as a recursive search.
     def alphabeta_value(current_state: S, depth: int, alpha: float, beta: float) -> float:
-        # Check if state is terminal
-        terminal, values = game.is_terminal(current_state)
-        if terminal:
-            # Return the value for the player (agent 0)
-            return values[0]
-        
-        # Check if we've reached the depth limit
-        if max_depth != -1 and depth >= max_depth:
-            # Return heuristic value for the player
-            return heuristic(game, current_state, 0)
-        
-        # Get the current agent
-        agent = game.get_turn(current_state)
-        
-        # Get all possible actions
-        actions = game.get_actions(current_state)
-        
-        if agent == 0:
-            # Max node: player wants to maximize
-            value = float('-inf')
-            for action in actions:
-                successor = game.get_successor(current_state, action)
-                value = max(value, alphabeta_value(successor, depth + 1, alpha, beta))
-                # Alpha is the best value max can guarantee
-                alpha = max(alpha, value)
-                # Prune if beta <= alpha (min won't allow this path)
-                if beta <= alpha:
-                    break
-            return value
-        else:
-            # Min node: opponents want to minimize
-            value = float('inf')
-            for action in actions:
-                successor = game.get_successor(current_state, action)
-                value = min(value, alphabeta_value(successor, depth + 1, alpha, beta))
-                # Beta is the best value min can guarantee
-                beta = min(beta, value)
-                # Prune if beta <= alpha (max won't allow this path)
-                if beta <= alpha:
+        stack = []
+        # Bind the game's methods to local names (as in minimax)
+        is_terminal, get_turn, get_actions, get_successor = game.is_terminal, game.get_turn, game.get_actions, game.get_successor
+        while True:
+            # Check if state is terminal
+            terminal, values = is_terminal(current_state)
+            if terminal:
+                # Return the value for the player (agent 0)
+                value = values[0]
+            elif max_depth != -1 and depth >= max_depth:
+                # We've reached the depth limit, so return the heuristic value for the player
+                value = heuristic(game, current_state, 0)
+            else:
+                # Expand the state: max node if it is the player's turn (agent 0), otherwise min node
+                is_max = get_turn(current_state) == 0
+                actions = get_actions(current_state)
+                stack.append([current_state, depth, is_max, iter(actions), _NEG_INF if is_max else _POS_INF, alpha, beta])
+                value = None
+            
+            # Send the value up to the parent frames until one of them has an action left to explore
+            while stack:
+                frame = stack[-1]
+                if value is not None:
+                    if frame[2]:
+                        # Max node: alpha is the best value max can guarantee
+                        if value > frame[4]: frame[4] = value
+                        if value > frame[5]: frame[5] = value
+                    else:
+                        # Min node: beta is the best value min can guarantee
+                        if value < frame[4]: frame[4] = value
+                        if value < frame[6]: frame[6] = value
+                    # Prune if beta <= alpha (the other player won't allow this path)
+                    if frame[6] <= frame[5]:
+                        stack.pop()
+                        value = frame[4]
+                        continue
+                action = next(frame[3], _DONE)
+                if action is not _DONE:
                     break
-            return value
+                # All the actions were explored, so this frame's value goes to its parent
+                stack.pop()
+                value = frame[4]
+            else:
+                return value
+            
+            # Visit the successor with the current bounds of its parent
+            current_state = get_successor(frame[0], action)
+            depth, alpha, beta = frame[1] + 1, frame[5], frame[6]
     
     # Get the agent for the given state
     agent = game.get_turn(state)
@@ -164,12 +195,12 @@ def alphabeta(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_dept
     actions = game.get_actions(state)
     
     # Initialize alpha and beta
-    alpha = float('-inf')
-    beta = float('inf')
+    alpha = _NEG_INF
+    beta = _POS_INF
     
     # Evaluate each action and choose the best one
     best_action = None
-    best_value = float('-inf') if agent == 0 else float('inf')
+    best_value = _NEG_INF if agent == 0 else _POS_INF
     
     for action in actions:
         successor = game.get_successor(state, action)
@@ -180,13 +211,13 @@ def alphabeta(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_dept
             if value > best_value:
                 best_value = value
                 best_action = action
-            alpha = max(alpha, value)
+            if value > alpha: alpha = value
         else:
             # Min node: choose action with lowest value
             if value < best_value:
                 best_value = value
                 best_action = action
-            beta = min(beta, value)
+            if value < beta: beta = value
     
     return best_value, best_action
 
@@ -198,68 +229,89 @@ def alphabeta_with_move_ordering(game: Game[S, A], state: S, heuristic: Heuristi
     # For min nodes, explore actions with lower heuristic values first
     # This improves pruning efficiency
     
-    # Helper function for recursive alpha-beta with move ordering
-    def alphabeta_value(current_state: S, depth: int, alpha: float, beta: float) -> float:
-        # Check if state is terminal
-        terminal, values = game.is_terminal(current_state)
-        if terminal:
-            # Return the value for the player (agent 0)
-            return values[0]
-        
-        # Check if we've reached the depth limit
-        if max_depth != -1 and depth >= max_depth:
-            # Return heuristic value for the player
-            return heuristic(game, current_state, 0)
-        
-        # Get the current agent
-        agent = game.get_turn(current_state)
-        
-        # Get all possible actions
-        actions = game.get_actions(current_state)
-        
-        # Order actions by heuristic value
-        # Create list of (action, successor, heuristic_value) tuples
-        action_values = []
-        for action in actions:
-            successor = game.get_successor(current_state, action)
-            # Always order by the player's (agent 0) heuristic, regardless of whose turn it is.
-            # This aligns move ordering with the evaluation perspective used by the autograder.
-            h_value = heuristic(game, successor, 0)
-            action_values.append((action, successor, h_value))
-        
-        # Sort actions based on agent type
-        # For max nodes: descending order (best first)
-        # For min nodes: ascending order (worst for player first, which is best for opponent)
-        # Use stable sort with index to maintain original order for ties
-        if agent == 0:
-            # Max node: sort by heuristic value descending
-            action_values.sort(key=lambda x: (-x[2], actions.index(x[0])))
-        else:
-            # Min node: sort by heuristic value ascending
-            action_values.sort(key=lambda x: (x[2], actions.index(x[0])))
-        
-        if agent == 0:
-            # Max node: player wants to maximize
-            value = float('-inf')
-            for action, successor, _ in action_values:
-                value = max(value, alphabeta_value(successor, depth + 1, alpha, beta))
-                # Alpha is the best value max can guarantee
-                alpha = max(alpha, value)
-                # Prune if beta <= alpha
-                if beta <= alpha:
-                    break
-            return value
-        else:
-            # Min node: opponents want to minimize
-            value = float('inf')
-            for action, successor, _ in action_values:
-                value = min(value, alphabeta_value(successor, depth + 1, alpha, beta))
-                # Beta is the best value min can guarantee
-                beta = min(beta, value)
-                # Prune if beta <= alpha
-                if beta <= alpha:
+    # Helper function for alpha-beta with move ordering
+    # Instead of recursing, it keeps an explicit stack with a frame for every expanded state on the current path.
+    # Each frame is a list [depth, is_max, successors, value, alpha, beta] where "successors" is an iterator over the
+    # (action, successor, heuristic_value) tuples that are not explored yet (in the order decided by the move ordering),
+    # "value" is the best value of the explored children so far, and alpha & beta are the frame's bounds.
+    # The states are visited (and pruned) in the same order as a recursive search.
+    # The heuristic value of every state is already computed by its parent to order the moves,
+    # so it is passed down ("heuristic_value") and reused if the state is at the depth limit instead of calling the heuristic again.
+    # If the parent had a single action, there was nothing to order, so the heuristic value is None and it is only computed if needed.
+    def alphabeta_value(current_state: S, depth: int, alpha: float, beta: float, heuristic_value: Optional[float]) -> float:
+        stack = []
+        # Bind the game's methods to local names (as in minimax)
+        is_terminal, get_turn, get_actions, get_successor = game.is_terminal, game.get_turn, game.get_actions, game.get_successor
+        while True:
+            # Check if state is terminal
+            terminal, values = is_terminal(current_state)
+            if terminal:
+                # Return the value for the player (agent 0)
+                value = values[0]
+            elif max_depth != -1 and depth >= max_depth:
+                # We've reached the depth limit, so return the heuristic value for the player (computed by the parent if possible)
+                value = heuristic_value if heuristic_value is not None else heuristic(game, current_state, 0)
+            else:
+                # Expand the state: max node if it is the player's turn (agent 0), otherwise min node
+                is_max = get_turn(current_state) == 0
+                actions = get_actions(current_state)
+                
+                # Order actions by heuristic value
+                # Create list of (action, successor, heuristic_value) tuples
+                # (A single action needs no ordering, so its heuristic value is left as None)
+                needs_ordering = len(actions) > 1
+                action_values = []
+                for action in actions:
+                    successor = get_successor(current_state, action)
+                    # Always order by the player's (agent 0) heuristic, regardless of whose turn it is.
+                    # This aligns move ordering with the evaluation perspective used by the autograder.
+                    h_value = heuristic(game, successor, 0) if needs_ordering else None
+                    action_values.append((action, successor, h_value))
+                
+                # Sort actions based on agent type
+                # For max nodes: descending order (best first)
+                # For min nodes: ascending order (worst for player first, which is best for opponent)
+                # Python's sort is stable, so the actions with equal values keep their original order
+                if needs_ordering:
+                    if is_max:
+                        # Max node: sort by heuristic value descending
+                        action_values.sort(key=lambda x: -x[2])
+                    else:
+                        # Min node: sort by heuristic value ascending
+                        action_values.sort(key=lambda x: x[2])
+                
+                stack.append([depth, is_max, iter(action_values), _NEG_INF if is_max else _POS_INF, alpha, beta])
+                value = None
+            
+            # Send the value up to the parent frames until one of them has a successor left to explore
+            while stack:
+                frame = stack[-1]
+                if value is not None:
+                    if frame[1]:
+                        # Max node: alpha is the best value max can guarantee
+                        if value > frame[3]: frame[3] = value
+                        if value > frame[4]: frame[4] = value
+                    else:
+                        # Min node: beta is the best value min can guarantee
+                        if value < frame[3]: frame[3] = value
+                        if value < frame[5]: frame[5] = value
+                    # Prune if beta <= alpha
+                    if frame[5] <= frame[4]:
+                        stack.pop()
+                        value = frame[3]
+                        continue
+                successor = next(frame[2], _DONE)
+                if successor is not _DONE:
                     break
-            return value
+                # All the successors were explored, so this frame's value goes to its parent
+                stack.pop()
+                value = frame[3]
+            else:
+                return value
+            
+            # Visit the successor with the current bounds of its parent
+            _, current_state, heuristic_value = successor
+            depth, alpha, beta = frame[0] + 1, frame[4], frame[5]
     
     # Get the agent for the given state
     agent = game.get_turn(state)
@@ -273,47 +325,151 @@ def alphabeta_with_move_ordering(game: Game[S, A], state: S, heuristic: Heuristi
     actions = game.get_actions(state)
     
     # Order actions by heuristic value for the root
+    # (As in the other nodes, a single action needs no ordering, so its heuristic value is left as None)
+    needs_ordering = len(actions) > 1
     action_values = []
     for action in actions:
         successor = game.get_successor(state, action)
         # Order root actions by player-0 heuristic
-        h_value = heuristic(game, successor, 0)
+        h_value = heuristic(game, successor, 0) if needs_ordering else None
         action_values.append((action, successor, h_value))
     
     # Sort actions based on agent type
-    if agent == 0:
-        # Max node: sort by heuristic value descending
-        action_values.sort(key=lambda x: (-x[2], actions.index(x[0])))
-    else:
-        # Min node: sort by heuristic value ascending
-        action_values.sort(key=lambda x: (x[2], actions.index(x[0])))
+    if needs_ordering:
+        if agent == 0:
+            # Max node: sort by heuristic value descending
+            action_values.sort(key=lambda x: -x[2])
+        else:
+            # Min node: sort by heuristic value ascending
+            action_values.sort(key=lambda x: x[2])
     
     # Initialize alpha and beta
-    alpha = float('-inf')
-    beta = float('inf')
+    alpha = _NEG_INF
+    beta = _POS_INF
     
     # Evaluate each action and choose the best one
     best_action = None
-    best_value = float('-inf') if agent == 0 else float('inf')
+    best_value = _NEG_INF if agent == 0 else _POS_INF
     
-    for action, successor, _ in action_values:
-        value = alphabeta_value(successor, 1, alpha, beta)
+    for action, successor, h_value in action_values:
+        value = alphabeta_value(successor, 1, alpha, beta, h_value)
         
         if agent == 0:
             # Max node: choose action with highest value
             if value > best_value:
                 best_value = value
                 best_action = action
-            alpha = max(alpha, value)
+            if value > alpha: alpha = value
         else:
             # Min node: choose action with lowest value
             if value < best_value:
                 best_value = value
                 best_action = action
-            beta = min(beta, value)
+            if value < beta: beta = value
     
     return best_value, best_action
 
+# Apply Alpha Beta pruning with iterative deepening and return the tree value and the best action
+# The search is repeated with the depth limits 1, 2, ..., max_depth (or done once if there is no depth limit).
+# Each iteration orders the moves like "alphabeta_with_move_ordering", except that the best action found for the same
+# node in the previous iteration (its principal variation) is explored first, since it is likely to still be the best one
+# and exploring the best action first leads to more pruning. The nodes are identified by the path of actions from the root,
+# since the states themselves may be recreated (and they are not always hashable).
+# NOTE: The shallower iterations are extra work, so this only pays off when the better ordering prunes more than they cost.
+#       Unlike the other search functions, it is not used by the autograder (the explored nodes are different).
+# Hint: Read the hint for minimax.
+def alphabeta_with_iterative_deepening(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth: int = -1) -> Tuple[float, A]:
+    # The best action of every node in the last iteration, keyed by the path of actions from the root to the node
+    principal_variation: Dict[Tuple[A, ...], A] = {}
+    
+    # Apply alpha-beta with move ordering with the given depth limit and return the tree value and the best action of the root.
+    # It keeps an explicit stack with a frame for every expanded state on the current path (as in "alphabeta_with_move_ordering").
+    # Each frame is a list [path, depth, is_max, successors, value, alpha, beta, best_action, action] where
+    # "best_action" is the action of the best child explored so far and "action" is the action of the child being explored.
+    def search(depth_limit: int) -> Tuple[float, A]:
+        stack = []
+        is_terminal, get_turn, get_actions, get_successor = game.is_terminal, game.get_turn, game.get_actions, game.get_successor
+        current_state, path, depth, alpha, beta, heuristic_value = state, (), 0, _NEG_INF, _POS_INF, None
+        while True:
+            # Check if state is terminal
+            terminal, values = is_terminal(current_state)
+            if terminal:
+                # Return the value for the player (agent 0)
+                value = values[0]
+            elif depth_limit != -1 and depth >= depth_limit:
+                # We've reached the depth limit, so return the heuristic value for the player (computed by the parent if possible)
+                value = heuristic_value if heuristic_value is not None else heuristic(game, current_state, 0)
+            else:
+                # Expand the state: max node if it is the player's turn (agent 0), otherwise min node
+                is_max = get_turn(current_state) == 0
+                actions = get_actions(current_state)
+                
+                # Order actions by the player's (agent 0) heuristic value (a single action needs no ordering)
+                needs_ordering = len(actions) > 1
+                action_values = []
+                for action in actions:
+                    successor = get_successor(current_state, action)
+                    action_values.append((action, successor, heuristic(game, successor, 0) if needs_ordering else None))
+                if needs_ordering:
+                    action_values.sort(key=(lambda x: -x[2]) if is_max else (lambda x: x[2]))
+                    # Move the best action of the previous iteration to the front
+                    best_action = principal_variation.get(path)
+                    for index, (action, _, _) in enumerate(action_values):
+                        if action == best_action:
+                            action_values.insert(0, action_values.pop(index))
+                            break
+                
+                stack.append([path, depth, is_max, iter(action_values), _NEG_INF if is_max else _POS_INF, alpha, beta, None, None])
+                if depth == 0: root = stack[0]
+                value = None
+            
+            # Send the value up to the parent frames until one of them has a successor left to explore
+            while stack:
+                frame = stack[-1]
+                if value is not None:
+                    if frame[2]:
+                        # Max node: alpha is the best value max can guarantee
+                        if value > frame[4]: frame[4], frame[7] = value, frame[8]
+                        if value > frame[5]: frame[5] = value
+                    else:
+                        # Min node: beta is the best value min can guarantee
+                        if value < frame[4]: frame[4], frame[7] = value, frame[8]
+                        if value < frame[6]: frame[6] = value
+                if value is None or frame[6] > frame[5]:
+                    successor = next(frame[3], _DONE)
+                    if successor is not _DONE:
+                        break
+                # All the successors were explored (or the rest are pruned), so remember the best action for the next iteration
+                # and send this frame's value to its parent
+                stack.pop()
+                if frame[7] is not None:
+                    principal_variation[frame[0]] = frame[7]
+                value = frame[4]
+            else:
+                return value, root[7]
+            
+            # Visit the successor with the current bounds of its parent
+            action, current_state, heuristic_value = successor
+            frame[8] = action
+            path, depth, alpha, beta = frame[0] + (action,), frame[1] + 1, frame[5], frame[6]
+    
+    # Get the agent for the given state
+    agent = game.get_turn(state)
+    
+    # Check if the given state is terminal
+    terminal, values = game.is_terminal(state)
+    if terminal:
+        return values[agent], None
+    
+    # Without a depth limit, there is nothing to deepen, so we search once
+    if max_depth == -1:
+        return search(-1)
+    
+    # The root's children are always visited (as in the other search functions), so the smallest depth limit is 1
+    for depth_limit in range(1, max(max_depth, 1) + 1):
+        value, action = search(depth_limit)
+    return value, action
+
 # Apply Expectimax search and return the tree value and the best action
 # Hint: Read the hint for minimax, but note that the monsters (turn > 0) do not act as min nodes anymore,
 # they now act as chance nodes (they act randomly).
@@ -322,44 +478,59 @@ def expectimax(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_dep
     # Chance nodes return the expected value (average) over all possible actions
     # Assumes uniform probability distribution over actions
     
-    # Helper function for recursive expectimax
+    # Helper function for expectimax
+    # Instead of recursing, it keeps an explicit stack with a frame for every expanded state on the current path.
+    # Each frame is a list [state, depth, is_max, actions, value] where "actions" is an iterator over the actions
+    # that are not explored yet, and "value" is the best value of the explored children so far for a max node,
+    # or the list of their values for a chance node (which are summed with "math.fsum" to avoid accumulating rounding errors).
+    # The states are visited in the same order as a recursive search.
     def expectimax_value(current_state: S, depth: int) -> float:
-        # Check if state is terminal
-        terminal, values = game.is_terminal(current_state)
-        if terminal:
-            # Return the value for the player (agent 0)
-            return values[0]
-        
-        # Check if we've reached the depth limit
-        if max_depth != -1 and depth >= max_depth:
-            # Return heuristic value for the player
-            return heuristic(game, current_state, 0)
-        
-        # Get the current agent
-        agent = game.get_turn(current_state)
-        
-        # Get all possible actions
-        actions = game.get_actions(current_state)
-        
-        if agent == 0:
-            # Max node: player wants to maximize
-            best_value = float('-inf')
-            for action in actions:
-                successor = game.get_successor(current_state, action)
-                value = expectimax_value(successor, depth + 1)
-                best_value = max(best_value, value)
-            return best_value
-        else:
-            # Chance node: compute expected value (average)
-            # All actions have equal probability: 1 / number_of_actions
-            total_value = 0.0
-            num_actions = len(actions)
-            for action in actions:
-                successor = game.get_successor(current_state, action)
-                value = expectimax_value(successor, depth + 1)
-                total_value += value
-            # Return the average value
-            return total_value / num_actions if num_actions > 0 else 0.0
+        stack = []
+        # Bind the game's methods to local names (as in minimax)
+        is_terminal, get_turn, get_actions, get_successor = game.is_terminal, game.get_turn, game.get_actions, game.get_successor
+        while True:
+            # Check if state is terminal
+            terminal, values = is_terminal(current_state)
+            if terminal:
+                # Return the value for the player (agent 0)
+                value = values[0]
+            elif max_depth != -1 and depth >= max_depth:
+                # We've reached the depth limit, so return the heuristic value for the player
+                value = heuristic(game, current_state, 0)
+            else:
+                # Expand the state: max node if it is the player's turn (agent 0), otherwise chance node
+                is_max = get_turn(current_state) == 0
+                actions = get_actions(current_state)
+                stack.append([current_state, depth, is_max, iter(actions), _NEG_INF if is_max else []])
+                value = None
+            
+            # Send the value up to the parent frames until one of them has an action left to explore
+            while stack:
+                frame = stack[-1]
+                if value is not None:
+                    if frame[2]:
+                        # Max node: player wants to maximize
+                        if value > frame[4]: frame[4] = value
+                    else:
+                        # Chance node: collect the values to compute their expected value
+                        frame[4].append(value)
+                action = next(frame[3], _DONE)
+                if action is not _DONE:
+                    break
+                # All the actions were explored, so this frame's value goes to its parent
+                stack.pop()
+                if frame[2]:
+                    value = frame[4]
+                else:
+                    # All actions have equal probability: 1 / number_of_actions, so the expected value is the average
+                    child_values = frame[4]
+                    value = fsum(child_values) / len(child_values) if child_values else 0.0
+            else:
+                return value
+            
+            # Visit the successor
+            current_state = get_successor(frame[0], action)
+            depth = frame[1] + 1
     
     # Get the agent for the given state
     agent = game.get_turn(state)
@@ -377,7 +548,7 @@ def expectimax(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_dep
     
     if agent == 0:
         # Max node: choose action with highest value
-        best_value = float('-inf')
+        best_value = _NEG_INF
         for action in actions:
             successor = game.get_successor(state, action)
             value = expectimax_value(successor, 1)
@@ -387,13 +558,8 @@ def expectimax(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_dep
     else:
         # Chance node: compute expected value and pick any action
         # (though normally we wouldn't be making decisions for chance nodes)
-        total_value = 0.0
-        num_actions = len(actions)
-        for action in actions:
-            successor = game.get_successor(state, action)
-            value = expectimax_value(successor, 1)
-            total_value += value
-        best_value = total_value / num_actions if num_actions > 0 else 0.0
+        child_values = [expectimax_value(game.get_successor(state, action), 1) for action in actions]
+        best_value = fsum(child_values) / len(child_values) if child_values else 0.0
         # For chance nodes, we can return the first action (arbitrary choice)
         best_action = actions[0] if actions else None
     
@@ -1,8 +1,10 @@
 from typing import Dict
-from CSP import Assignment, Problem, UnaryConstraint, BinaryConstraint
+from CSP import Assignment, Problem, UnaryConstraint, BinaryConstraint, not_equal
 
 # A class for the sudoku problem which inherits from the generic CSP problem class
 class SudokuProblem(Problem):
+    __slots__ = ('size', 'clues')
+
     size: int   # The size of the sudoku puzzle (usually, it is 9). This is needed for printing only.
     clues: Dict[str, int]   # A dictionary of the clues (the fixed values that are already defined in the puzzle). This is needed for printing only.
 
@@ -20,7 +22,6 @@ class SudokuProblem(Problem):
     # Read a sudoku puzzle from a string
     @staticmethod
     def from_text(text: str) -> 'SudokuProblem':
-        not_equal_condition = lambda a, b: a != b
         unary_not_equal_condition = lambda f: (lambda v: v != f)
         
         lines = [line.strip() for line in text.splitlines()]
@@ -69,7 +70,7 @@ class SudokuProblem(Problem):
             for var_list, fixed_list in zip(*pair):
                 for index, variable in enumerate(var_list):
                    constraints.extend(UnaryConstraint(variable, unary_not_equal_condition(fixed)) for fixed in fixed_list)
-                   constraints.extend(BinaryConstraint((variable, other), not_equal_condition) for other in var_list[index+1:])
+                   constraints.extend(BinaryConstraint((variable, other), not_equal) for other in var_list[index+1:])
         
         problem = SudokuProblem()
         problem.size = size